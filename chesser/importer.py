@@ -260,7 +260,7 @@ def import_variation(
         move.save()
 
     validate_mainline_string(
-        [m.san for m in variation.moves.all()],
+        list(variation.moves.values_list("san", flat=True)),
         variation.mainline_moves_str,
     )
 
@@ -24,11 +24,7 @@ class Command(BaseCommand):
     def handle(self, *args, **kwargs):
         file_path = kwargs["file"]
 
-        qs = (
-            Variation.objects.select_related("chapter")
-            .prefetch_related("moves")
-            .order_by("id")
-        )
+        qs = Variation.objects.for_export().order_by("id")
 
         if file_path == "-":
             self._write_chunks(sys.stdout, qs)
@@ -85,7 +85,7 @@ class Command(BaseCommand):
                 path_finder = PathFinder(
                     parsed_blocks,
                     move.move_verbose,
-                    board.copy(),
+                    board,
                     stats,
                 )
                 resolved_moves = path_finder.resolve_moves()
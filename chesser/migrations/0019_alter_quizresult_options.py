@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-16 19:48
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chesser", "0018_alter_chapter_options"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="quizresult",
+            options={"ordering": ["-datetime"]},
+        ),
+    ]
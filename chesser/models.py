@@ -1,7 +1,18 @@
+from collections import defaultdict
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models, transaction
-from django.db.models import Case, IntegerField, UniqueConstraint, Value, When
+from django.db.models import (
+    Case,
+    Count,
+    IntegerField,
+    Max,
+    Prefetch,
+    UniqueConstraint,
+    Value,
+    When,
+)
 from django.utils import timezone
 
 
@@ -35,6 +46,30 @@ class VariationQuerySet(models.QuerySet):
     def archived(self):
         return self.filter(archived=True)
 
+    def for_serialization(self):
+        """
+        Everything serialize_variation touches, fetched up front: the chapter,
+        moves with their shared moves (resolved fields), and quiz history.
+        """
+        return self.select_related("chapter").prefetch_related(
+            Prefetch("moves", queryset=Move.objects.select_related("shared_move")),
+            Prefetch("quiz_results", queryset=QuizResult.objects.order_by("-datetime")),
+        )
+
+    def with_latest_quiz_datetime(self):
+        """Saves a query per variation in get_latest_quiz_result_datetime."""
+        return self.annotate(latest_quiz_datetime=Max("quiz_results__datetime"))
+
+    def for_export(self):
+        """Everything serialize_variation_to_import_format touches."""
+        return (
+            self.select_related("chapter")
+            .prefetch_related(
+                Prefetch("moves", queryset=Move.objects.select_related("shared_move"))
+            )
+            .with_latest_quiz_datetime()
+        )
+
 
 class Variation(models.Model):
     """
@@ -148,13 +183,19 @@ class Variation(models.Model):
         )
 
     def get_latest_quiz_result_datetime(self):
+        if hasattr(self, "latest_quiz_datetime"):  # with_latest_quiz_datetime()
+            return self.latest_quiz_datetime
+        if "quiz_results" in getattr(self, "_prefetched_objects_cache", {}):
+            return max((r.datetime for r in self.quiz_results.all()), default=None)
         latest_result = self.quiz_results.order_by("-datetime").first()
         return latest_result.datetime if latest_result else None
 
     @classmethod
     def due_for_review(cls):
+        # fetched ready to serialize, since that's what the review page does next
         return (
-            cls.objects.active()
+            cls.objects.for_serialization()
+            .active()
             .filter(next_review__lte=timezone.now())
             .order_by("next_review")
             .first()
@@ -200,6 +241,9 @@ class QuizResult(models.Model):
     level = models.IntegerField()  # 0 unlearned, 1 first rep. interval, etc
     passed = models.BooleanField(default=False)
 
+    class Meta:
+        ordering = ["-datetime"]
+
 
 class AnnotatedMove(models.Model):
     fen = models.CharField(db_index=True)
@@ -272,23 +316,32 @@ class Move(AnnotatedMove):
         self.clean()
         super().save(*args, **kwargs)
 
+    RESOLVED_FIELD_DEFAULTS = {
+        "text": "",
+        "annotation": "",
+        "alt": "",
+        "alt_fail": "",
+        "shapes": "[]",
+    }
+
     def get_resolved_field(self, field_name: str) -> str:
-        field_defaults = {
-            "text": "",
-            "annotation": "",
-            "alt": "",
-            "alt_fail": "",
-            "shapes": "[]",
-        }
         assert (
-            field_name in field_defaults
+            field_name in self.RESOLVED_FIELD_DEFAULTS
         ), f"Field '{field_name}' is not resolvable via shared_move"
-        default = field_defaults[field_name]
+        default = self.RESOLVED_FIELD_DEFAULTS[field_name]
 
         if self.shared_move:
             return getattr(self.shared_move, field_name) or default
         return getattr(self, field_name) or default
 
+    def get_resolved_fields(self) -> dict[str, str]:
+        """All of the get_resolved_field values, resolving shared_move once."""
+        source = self.shared_move or self
+        return {
+            field_name: getattr(source, field_name) or default
+            for field_name, default in self.RESOLVED_FIELD_DEFAULTS.items()
+        }
+
     @property
     def white_to_move(self):
         return self.sequence % 2 == 0
@@ -327,22 +380,46 @@ class SharedMove(AnnotatedMove):
         return f"{move_number}{dots}{self.san} #{self.id}"
 
 
+def get_shared_candidate_data(shared_move):
+    return {
+        "annotation": shared_move.annotation,
+        "text": shared_move.text,
+        "alt": shared_move.alt,
+        "alt_fail": shared_move.alt_fail,
+        "shapes": shared_move.shapes,
+    }
+
+
 def get_shared_candidates(fen, san, opening_color):
     candidates = SharedMove.objects.filter(
         fen=fen, san=san, opening_color=opening_color
     ).order_by("id")
     return {
-        str(shared_move.id): {
-            "annotation": shared_move.annotation,
-            "text": shared_move.text,
-            "alt": shared_move.alt,
-            "alt_fail": shared_move.alt_fail,
-            "shapes": shared_move.shapes,
-        }
+        str(shared_move.id): get_shared_candidate_data(shared_move)
         for shared_move in candidates
     }
 
 
+def get_shared_candidates_for_moves(moves, opening_color):
+    """
+    get_shared_candidates for a batch of moves in one query, keyed by (fen, san).
+    Positions without candidates are left out.
+    """
+    keys = {(move.fen, move.san) for move in moves}
+    candidates = SharedMove.objects.filter(
+        fen__in={fen for fen, _ in keys}, opening_color=opening_color
+    ).order_by("id")
+
+    candidates_by_key = defaultdict(dict)
+    for shared_move in candidates:
+        key = (shared_move.fen, shared_move.san)
+        if key in keys:
+            candidates_by_key[key][str(shared_move.id)] = get_shared_candidate_data(
+                shared_move
+            )
+    return dict(candidates_by_key)
+
+
 def get_matching_moves(fen, san, color, exclude_id=None):
     qs = Move.objects.filter(
         fen=fen,
@@ -352,3 +429,20 @@ def get_matching_moves(fen, san, color, exclude_id=None):
     if exclude_id:
         qs = qs.exclude(id=exclude_id)
     return qs
+
+
+def get_matching_move_counts(moves, color):
+    """get_matching_moves(...).count() for a batch of moves, keyed by (fen, san)."""
+    keys = {(move.fen, move.san) for move in moves}
+    rows = (
+        Move.objects.filter(
+            fen__in={fen for fen, _ in keys}, variation__chapter__color=color
+        )
+        .values("fen", "san")
+        .annotate(count=Count("id"))
+    )
+    return {
+        (row["fen"], row["san"]): row["count"]
+        for row in rows
+        if (row["fen"], row["san"]) in keys
+    }
@@ -2,6 +2,7 @@ import re
 from collections import defaultdict, namedtuple
 from copy import copy
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Literal, Optional
 
 import chess
@@ -11,9 +12,11 @@ from chesser.models import Move
 AMBIGUOUS = -1
 LITERAL_LBRACE = "\ufff0"  # From Unicode Private Use Area — safe, invisible,
 LITERAL_RBRACE = "\ufff1"  # and extremely unlikely to collide with real text.
+# single-char sentinels, so restoring them is one str.translate pass
+RESTORE_BRACES_TABLE = str.maketrans({LITERAL_LBRACE: "{", LITERAL_RBRACE: "}"})
 
 
-@dataclass
+@dataclass(slots=True)
 class Chunk:
     type_: Literal["comment", "move", "fenseq", "subvar"]
     data: str
@@ -24,19 +27,30 @@ MoveParts = namedtuple("MoveParts", ["num", "dots", "san", "annotation"])
 
 def assemble_move_parts(move_parts: MoveParts) -> str:
     """Create "verbose" string representation."""
-    num = str(move_parts.num) if move_parts.num else ""
-    dots = move_parts.dots
-    san = move_parts.san
-    annotation = move_parts.annotation
-
-    return f"{num}{dots}{san}{annotation}".strip()
+    num, dots, san, annotation = move_parts
+    return f"{num or ''}{dots}{san}{annotation}".strip()
 
 
 def get_empty_move_parts() -> MoveParts:
     return MoveParts(None, "", "", "")
 
 
-@dataclass
+@lru_cache(maxsize=256)
+def _parse_fen(fen: str) -> chess.Board:
+    return chess.Board(fen)
+
+
+def get_board_from_fen(fen: str) -> chess.Board:
+    """
+    fenseq blocks often repeat the same FEN and parsing one costs far more
+    than copying a board, so we parse each FEN once and hand out copies
+    (callers push moves, so they can't share the cached board). Raises
+    ValueError for an invalid FEN, same as chess.Board.
+    """
+    return _parse_fen(fen).copy()
+
+
+@dataclass(slots=True)
 class ParsedBlock:
     # we started with chunk types: "comment", "subvar", "fenseq", "move"
     type_: Literal["comment", "start", "end", "move"]
@@ -118,7 +132,7 @@ class ParsedBlock:
         return info
 
 
-@dataclass
+@dataclass(slots=True)
 class ResolveStats:
     # ad hoc stats, just needs a unique label to count
     sundry: dict[str, int] = field(default_factory=lambda: defaultdict(int))
@@ -193,6 +207,8 @@ MOVE_PARTS_REGEX = re.compile(r"""(?x)                # verbose 💬
     """)
 
 
+# pure, returns an immutable MoveParts, and sees the same tokens over and over
+@lru_cache(maxsize=4096)
 def get_move_parts(text: str) -> MoveParts:
     """
     Breaks a literal move string into its core parts:
@@ -231,6 +247,10 @@ def get_move_parts(text: str) -> MoveParts:
         return MoveParts(None, "", text.strip(), "")
 
 
+def move_to_ply(num: int, dots: str) -> int:
+    return (num - 1) * 2 + (1 if dots == "..." else 0)
+
+
 def get_resolved_move_distance(
     resolved_move_parts: MoveParts, raw_move_parts: MoveParts
 ):
@@ -253,9 +273,6 @@ def get_resolved_move_distance(
         err = f"resolved_move_parts not provided; raw_move_parts = {raw_move_parts}"
         raise ValueError(err)
 
-    def move_to_ply(num, dots):
-        return (num - 1) * 2 + (1 if dots == "..." else 0)
-
     resolved_ply = move_to_ply(resolved_move_parts.num, resolved_move_parts.dots)
     raw_ply = move_to_ply(raw_move_parts.num, raw_move_parts.dots)
     return abs(resolved_ply - raw_ply)
@@ -269,7 +286,7 @@ def same_move_identity(a: MoveParts, b: MoveParts) -> bool:
     return a.num == b.num and a.dots == b.dots and a.san == b.san
 
 
-@dataclass
+@dataclass(slots=True)
 class StackFrame:
     board: chess.Board
     root_block: ParsedBlock
@@ -299,6 +316,8 @@ class PathFinder:
         self.blocks = blocks
         self.resolved_blocks = []  # "finished" blocks, whether or not truly "resolved"
         self.mainline_move_verbose = mainline_move_verbose
+        # only read; stack frames below get their own copy to play moves on,
+        # so callers can pass their live board without copying it first
         self.board = board
 
         # make a parsed move block for the mainline move -
@@ -337,7 +356,7 @@ class PathFinder:
         is_fenseq = True if block.fen else False
         if is_fenseq:
             try:
-                chessboard = chess.Board(block.fen)
+                chessboard = get_board_from_fen(block.fen)
             except ValueError as e:
                 print(f"Invalid FEN in start block: {block.fen} - {e}")
                 # use default starating position, which will work in many
@@ -384,7 +403,8 @@ class PathFinder:
         assert block.type_ == "move"
 
         clone = block.clone()
-        board = board.copy() if board else self.current.board.copy()
+        # we push and pop on the live board rather than copying it per attempt
+        board = board if board else self.current.board
         san = clone.move_parts_raw.san
 
         try:
@@ -398,17 +418,20 @@ class PathFinder:
             return clone
 
         board.push(move_obj)
-        self.stats.sundry["moves resolved"] += 1
-
-        # turn = True means it's white's move *now*, so we reverse things
-        # to figure out dots for move just played
+        try:
+            # turn = True means it's white's move *now*, so we reverse things
+            # to figure out dots for move just played
+            move_parts_resolved = MoveParts(
+                num=(board.ply() + 1) // 2,
+                dots="..." if board.turn else ".",
+                san=san,
+                annotation=clone.move_parts_raw.annotation,
+            )
+            clone.fen = board.fen()
+        finally:
+            board.pop()
 
-        move_parts_resolved = MoveParts(
-            num=(board.ply() + 1) // 2,
-            dots="..." if board.turn else ".",
-            san=san,
-            annotation=clone.move_parts_raw.annotation,
-        )
+        self.stats.sundry["moves resolved"] += 1
 
         resolved_move_distance = get_resolved_move_distance(
             move_parts_resolved, clone.move_parts_raw
@@ -416,7 +439,6 @@ class PathFinder:
 
         clone.move_parts_resolved = move_parts_resolved
         clone.raw_to_resolved_distance = resolved_move_distance
-        clone.fen = board.fen()
 
         clone.log.append(
             f"Resolved ➤ {tuple(clone.move_parts_raw)} ➤ "
@@ -491,6 +513,9 @@ class PathFinder:
         would be confusing to drop. So we only discard if there is a following
         move. On 16 May 2025, there are 833 with a next move and 105 not.
         """
+        if self.current.move_counter != 1:
+            return False  # only the first move of a subvar can dupe the root
+
         root_parts = self.current.root_block.move_parts_resolved
         this_raw_equals_root_resolved = (
             self.current.root_block.is_playable
@@ -498,31 +523,31 @@ class PathFinder:
             and same_move_identity(block.move_parts_raw, root_parts)
         )
 
-        if self.current.move_counter == 1 and (this_raw_equals_root_resolved):
-            # we have a dupe, but is it a *discardable* dupe?
+        if not this_raw_equals_root_resolved:
+            return False
 
-            next_block = self.get_next_block()
-            assert next_block is not None  # should be at least a subvar end block
+        # we have a dupe, but is it a *discardable* dupe?
 
-            # we'll update stats and log this even though we're not *doing*
-            # the discarding in here; it just seems cleaner to keep here
+        next_block = self.get_next_block()
+        assert next_block is not None  # should be at least a subvar end block
 
-            if next_block.type_ == "move":
-                # if it appears before other moves, the dupe root move
-                # *probably* isn't being explicitly talked about, so let's
-                # discard it to make things look cleaner
-                self.stats.sundry["➤ root dupe discarded"] += 1
-                self.attach_log_to_previous_start_block(
-                    "🗑️  Discarding move block same as root: " f"{block.move_parts_raw}"
-                )
-                return True
-            else:
-                # if there's not an immediate following move, there's a
-                # good chance neighboring text is talking about this, so
-                # we should keep it
-                self.stats.sundry["➤ root dupe NOT discarded"] += 1
-                return False
+        # we'll update stats and log this even though we're not *doing*
+        # the discarding in here; it just seems cleaner to keep here
+
+        if next_block.type_ == "move":
+            # if it appears before other moves, the dupe root move
+            # *probably* isn't being explicitly talked about, so let's
+            # discard it to make things look cleaner
+            self.stats.sundry["➤ root dupe discarded"] += 1
+            self.attach_log_to_previous_start_block(
+                "🗑️  Discarding move block same as root: " f"{block.move_parts_raw}"
+            )
+            return True
         else:
+            # if there's not an immediate following move, there's a
+            # good chance neighboring text is talking about this, so
+            # we should keep it
+            self.stats.sundry["➤ root dupe NOT discarded"] += 1
             return False
 
     def get_root_sibling(self, block: ParsedBlock):
@@ -570,7 +595,7 @@ class PathFinder:
         but we'll wait.)
         """
         assert self.current.root_block.is_playable is False  # fenseq
-        board = chess.Board(self.current.root_block.fen)
+        board = get_board_from_fen(self.current.root_block.fen)
         clone = block.clone()
 
         pending_block = self.parse_move(clone, board)
@@ -887,6 +912,16 @@ def get_parsed_blocks_first_pass(chunks: list[Chunk]) -> list[ParsedBlock]:
     return parsed_blocks
 
 
+FENSEQ_WITH_FEN_RE = re.compile(
+    r"""<\s*fenseq[^>]*data-fen=["']([^"']+)["'][^>]*>(.*?)</fenseq>""",
+    re.DOTALL,
+)
+FENSEQ_RE = re.compile(
+    r"""<\s*fenseq[^>]*(data-fen=["']{2})?[^>]*>(.*?)</fenseq>""",
+    re.DOTALL,
+)
+
+
 def parse_fenseq_chunk(raw: str) -> list[ParsedBlock]:
     """
     e.g.
@@ -907,17 +942,9 @@ def parse_fenseq_chunk(raw: str) -> list[ParsedBlock]:
     looked for <fenseq so this should be good! 🤞
     """
     fen = inner_text = ""
-    match = re.search(
-        r"""<\s*fenseq[^>]*data-fen=["']([^"']+)["'][^>]*>(.*?)</fenseq>""",
-        raw,
-        re.DOTALL,
-    )
+    match = FENSEQ_WITH_FEN_RE.search(raw)
     if not match:
-        match = re.search(
-            r"""<\s*fenseq[^>]*(data-fen=["']{2})?[^>]*>(.*?)</fenseq>""",
-            raw,
-            re.DOTALL,
-        )
+        match = FENSEQ_RE.search(raw)
     if not match:  # may be hard to reach this block, if not impossible?
         print(f"🚨 Invalid fenseq block: {raw}")
         return []
@@ -970,13 +997,19 @@ def parse_fenseq_chunk(raw: str) -> list[ParsedBlock]:
     return blocks
 
 
+BR_TAG_RE = re.compile(r"<br\s*/?>")
+NEWLINE_PADDING_RE = re.compile(r"[ \t\r\f\v]*\n[ \t\r\f\v]*")
+EXTRA_NEWLINES_RE = re.compile(r"\n{3,}")
+EXTRA_SPACES_RE = re.compile(r" +")
+
+
 def get_cleaned_comment_parsed_block(raw: str, depth: int) -> ParsedBlock:
     # we don't expect/want <br/> tags in move.text but they're easy to handle
-    cleaned = re.sub(r"<br\s*/?>", "\n", raw)
+    cleaned = BR_TAG_RE.sub("\n", raw)
     # remove whitespace around newlines
-    cleaned = re.sub(r"[ \t\r\f\v]*\n[ \t\r\f\v]*", "\n", cleaned)
-    cleaned = re.sub(r"\n{3,}", "\n\n", cleaned)  # collapse newlines
-    cleaned = re.sub(r" +", " ", cleaned)  # collapse spaces
+    cleaned = NEWLINE_PADDING_RE.sub("\n", cleaned)
+    cleaned = EXTRA_NEWLINES_RE.sub("\n\n", cleaned)  # collapse newlines
+    cleaned = EXTRA_SPACES_RE.sub(" ", cleaned)  # collapse spaces
     return ParsedBlock(
         type_="comment",
         raw=raw,
@@ -985,6 +1018,11 @@ def get_cleaned_comment_parsed_block(raw: str, depth: int) -> ParsedBlock:
     )
 
 
+def is_move_number_token(token: str) -> bool:
+    """1. or 1... (so far); string methods are cheaper than a regex per token"""
+    return token.rstrip().rstrip(".").isdecimal()
+
+
 def extract_ordered_chunks(text: str) -> list[Chunk]:
     chunks = []
     mode = "neutral"  # can be: neutral, comment, subvar
@@ -1018,7 +1056,7 @@ def extract_ordered_chunks(text: str) -> list[Chunk]:
         c = text[i]
 
         # Handle <fenseq ... </fenseq> as atomic
-        if mode == "neutral" and text[i:].startswith("<fenseq"):
+        if mode == "neutral" and text.startswith("<fenseq", i):
             flush_token()
             # we'll naively check for the end tag and accept irregular results
             # for unlikey html soup like <fenseq blah <fenseq>...</fenseq>
@@ -1084,7 +1122,7 @@ def extract_ordered_chunks(text: str) -> list[Chunk]:
             if c.isspace():
                 if token_start is not None:
                     token = text[token_start:i]
-                    if re.match(r"^\d+\.*\s*$", token):
+                    if is_move_number_token(token):
                         # still building a move number like "1." or "1..."
                         pass
                     else:
@@ -1149,7 +1187,7 @@ def restore_literal_braces(value):
         return value
 
     if isinstance(value, str):
-        return value.replace(LITERAL_LBRACE, "{").replace(LITERAL_RBRACE, "}")
+        return value.translate(RESTORE_BRACES_TABLE)
 
     # Assume iterable of ParsedBlock
     for block in value:
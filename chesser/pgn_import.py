@@ -12,6 +12,9 @@ _DIRECTIVE_RE = re.compile(r"\[%([a-zA-Z]+)\s+([^\]]*)\]")
 _CAL_CSL_COLORS = {"G": "green", "R": "red", "B": "blue", "Y": "yellow"}
 _SQUARE_RE = re.compile(r"^[a-h][1-8]$")
 _ARROW_RE = re.compile(r"^[a-h][1-8][a-h][1-8]$")
+_PAYLOAD_SEPARATOR_RE = re.compile(r"[\s,]+")
+_LEADING_BRACE_SPACES_RE = re.compile(r"^\s*{ +", re.MULTILINE)
+_SPACES_RE = re.compile(r" +")
 
 # NAG = Numeric Annotation Glyphs (PGN supports either NAG numbers or glyphs)
 NAG_LOOKUP = {
@@ -91,7 +94,7 @@ def convert_pgn_to_json(
                 "move_num": move_number,
                 "san": san,
                 "annotation": primary_glyph(next_node.nags),
-                "text": extract_move_text(next_node),
+                "text": extract_move_text(next_node, board),
                 "alt": "",
                 "alt_fail": "",
                 "shapes": [],
@@ -131,25 +134,30 @@ def move_token(parent_board, move, nags: set[int], force_number: bool) -> str:
     return san
 
 
-def render_variation_line(start: chess.pgn.GameNode) -> str:
+def render_variation_line(
+    start: chess.pgn.GameNode, board: chess.Board | None = None
+) -> str:
     """
     Render a variation starting at `start` (a move node), continuing down its mainline.
     Prints move numbers and keeps the important ordering:
       - print a move
       - its comment
       - then (at each position) print main reply first, then sibling alternatives
+
+    `board` is the position before `start` and is advanced in place as we go;
+    node.board() replays from the root each call, which is quadratic on long lines.
     """
     parts: list[str] = []
     cur: chess.pgn.GameNode | None = start
+    if board is None:
+        board = start.parent.board()
 
     # At the start of a variation, Black moves should show "..."
     force_number = True
 
     while cur is not None and cur.move is not None:
-        parent = cur.parent
-        pb = parent.board()
-
-        parts.append(move_token(pb, cur.move, cur.nags, force_number))
+        parts.append(move_token(board, cur.move, cur.nags, force_number))
+        board.push(cur.move)  # position after cur.move (i.e., before next ply)
 
         # Once we print a move, continuation is smooth again
         force_number = False
@@ -166,8 +174,7 @@ def render_variation_line(start: chess.pgn.GameNode) -> str:
             main = cur.variations[0]
 
             # emit the main next move immediately (so siblings appear "after" it)
-            nb = cur.board()  # position after cur.move (i.e., before next ply)
-            parts.append(move_token(nb, main.move, main.nags, force_number))
+            parts.append(move_token(board, main.move, main.nags, force_number))
             force_number = False
 
             if main.comment:
@@ -176,9 +183,12 @@ def render_variation_line(start: chess.pgn.GameNode) -> str:
 
             # emit sibling alternatives to that next ply
             for alt in cur.variations[1:]:
-                parts.append(f"({render_variation_line(alt)})")
+                alt_line = render_variation_line(alt, board.copy(stack=False))
+                parts.append(f"({alt_line})")
                 force_number = True  # variation break resets numbering
 
+            board.push(main.move)
+
             # continue from main's continuation (already emitted main's token/comment)
             cur = main.variations[0] if main.variations else None
         else:
@@ -187,7 +197,9 @@ def render_variation_line(start: chess.pgn.GameNode) -> str:
     return " ".join(parts).strip()
 
 
-def extract_move_text(node: chess.pgn.GameNode) -> str:
+def extract_move_text(
+    node: chess.pgn.GameNode, parent_board: chess.Board | None = None
+) -> str:
     parts: list[str] = []
 
     # 1) comment on the move itself
@@ -197,9 +209,12 @@ def extract_move_text(node: chess.pgn.GameNode) -> str:
     # 2) sibling alternatives to THIS move (i.e., other replies at the parent position)
     # attach them to the mainline move only (which is what your loop is iterating)
     if node.parent is not None:
+        if parent_board is None:
+            parent_board = node.parent.board()
         for alt in node.parent.variations[1:]:
             if alt is not node:
-                parts.append(f"({render_variation_line(alt)})")
+                alt_line = render_variation_line(alt, parent_board.copy(stack=False))
+                parts.append(f"({alt_line})")
 
     return "\n\n".join(parts).strip()
 
@@ -248,12 +263,12 @@ def extract_pgn_directives(text: str) -> tuple[str, list[dict]]:
 
         if key == "csl":
             # Example payload: "Rf3,Yd4"
-            for token in re.split(r"[\s,]+", payload):
+            for token in _PAYLOAD_SEPARATOR_RE.split(payload):
                 if token:
                     add_circle(token[0], token[1:])
         elif key == "cal":
             # Example payload: "Gg4f3,Rc1h6"
-            for token in re.split(r"[\s,]+", payload):
+            for token in _PAYLOAD_SEPARATOR_RE.split(payload):
                 if token:
                     add_arrow(token[0], token[1:])
 
@@ -262,8 +277,8 @@ def extract_pgn_directives(text: str) -> tuple[str, list[dict]]:
     if cleaned != text:
         # there were directives: strip remaining leading space and other extra
         # (be careful not to strip newlines; we should have better tests...)
-        cleaned = re.sub(r"^\s*{ +", "{", cleaned, flags=re.MULTILINE)
-        cleaned = re.sub(r" +", " ", cleaned).strip()
+        cleaned = _LEADING_BRACE_SPACES_RE.sub("{", cleaned)
+        cleaned = _SPACES_RE.sub(" ", cleaned).strip()
 
     if cleaned in ("{}", "{ }"):
         cleaned = ""
@@ -1,9 +1,12 @@
+import hashlib
 import json
 import re
 from collections import defaultdict
 from dataclasses import dataclass
+from functools import lru_cache
 
 import chess
+from django.core.cache import cache
 from django.utils import timezone
 from django.utils.html import format_html, strip_tags
 from django.utils.safestring import mark_safe
@@ -13,8 +16,9 @@ from chesser.models import (
     Chapter,
     Move,
     SharedMove,
-    get_matching_moves,
+    get_matching_move_counts,
     get_shared_candidates,
+    get_shared_candidates_for_moves,
 )
 from chesser.move_resolver import ParsedBlock, get_parsed_blocks
 
@@ -47,12 +51,19 @@ BLOCK_TAG_RE = re.compile(
     re.IGNORECASE,
 )
 
+VARIATION_HTML_CACHE_TIMEOUT = 60 * 60 * 24  # a day
+# bump when the rendered HTML changes, so a deploy doesn't serve stale renders
+VARIATION_HTML_CACHE_VERSION = 1
+
 
 def serialize_variation(variation, mode="review"):
     include_html = mode == "variation"
     include_alt_shapes = mode == "variation"
     for_edit = mode == "edit"
 
+    # read once; the html, the analysis url and the move list all need them
+    move_list = list(variation.moves.all())
+
     color = variation.chapter.color
 
     now = timezone.now()
@@ -62,7 +73,7 @@ def serialize_variation(variation, mode="review"):
     time_until_next_review = util.format_time_until(now, variation.next_review)
 
     source_html = get_source_html(variation.source) if include_html else None
-    html = generate_variation_html(variation) if include_html else None
+    html = generate_variation_html(variation, move_list) if include_html else None
 
     variation_data = {
         "variation_id": variation.id,
@@ -81,7 +92,9 @@ def serialize_variation(variation, mode="review"):
         "mainline": variation.mainline_moves_str,
         "source_html": source_html,
         "html": html,
-        "analysis_url": util.get_analysis_url(variation),
+        "analysis_url": util.get_analysis_url(
+            variation, sans=[move.san for move in move_list]
+        ),
     }
 
     if for_edit:
@@ -89,21 +102,37 @@ def serialize_variation(variation, mode="review"):
             {"id": c.id, "title": c.title}
             for c in Chapter.objects.filter(color=color).order_by("title")
         ]
+        # one query each for the whole variation rather than per move
+        shared_candidates = get_shared_candidates_for_moves(move_list, color)
+        matching_move_counts = get_matching_move_counts(move_list, color)
 
-    temp_annotations = ANNOTATIONS.copy()
+    # copy on write: most variations only use known annotations
+    temp_annotations = ANNOTATIONS
     moves = []
-    for move in variation.moves.all():
+    for move in move_list:
         # preserve "unknown" annotations in dropdown
         shared_annotation = move.shared_move.annotation if move.shared_move else None
         for annotation in (move.annotation, shared_annotation):
             if annotation and annotation not in temp_annotations:
+                if temp_annotations is ANNOTATIONS:
+                    temp_annotations = dict(ANNOTATIONS)
                 temp_annotations[annotation] = f"unknown: {annotation}"
                 print(
                     "unknown annotation in variation "
                     f"{variation.id}: {move.move_verbose} ➤ {annotation}"
                 )
 
-        moves.append(serialize_move(move, for_edit=for_edit))
+        if for_edit:
+            key = (move.fen, move.san)
+            move_data = serialize_move(
+                move,
+                for_edit=True,
+                shared_candidates=shared_candidates.get(key, {}),
+                matching_move_count=matching_move_counts.get(key, 0),
+            )
+        else:
+            move_data = serialize_move(move)
+        moves.append(move_data)
 
     if include_alt_shapes:
         add_alt_shapes_to_moves(moves)
@@ -115,57 +144,58 @@ def serialize_variation(variation, mode="review"):
     return variation_data
 
 
-def serialize_move(move, for_edit=False):
+def serialize_move(
+    move, for_edit=False, shared_candidates=None, matching_move_count=None
+):
     # editor has special handling for all move data;
     # other modes only need the "resolved" moves
+    # (for_edit needs the caller's batched shared candidates and match count)
 
     shared = move.shared_move  # is there a shared move?
+    # outside the editor, read the shareable fields straight from wherever
+    # they resolve so each row is built once, without a merge afterwards
+    source = shared if shared and not for_edit else move
 
     move_data = {
         "move_id": move.id,
         "fen": move.fen,
         "san": move.san,
-        "annotation": move.annotation,
+        "annotation": source.annotation,
         "move_verbose": move.move_verbose,
-        "text": move.text,
-        "alt": move.alt,
-        "alt_fail": move.alt_fail,
-        "shapes": move.shapes,
+        "text": source.text,
+        "alt": source.alt,
+        "alt_fail": source.alt_fail,
+        "shapes": source.shapes,
         "shared_move_id": str(shared.id) if shared else "",
     }
 
-    if shared:
-        shared_fields = {
+    if shared and for_edit:
+        # we don't strictly need "shared": we could get this info
+        # from shared_candidates, but it makes things easier in
+        # the UI to have it here
+        move_data["shared"] = {
             "text": shared.text,
             "annotation": shared.annotation,
             "alt": shared.alt,
             "alt_fail": shared.alt_fail,
             "shapes": shared.shapes,
         }
-        if for_edit:
-            # we don't strictly need "shared": we could get this info
-            # from shared_candidates, but it makes things easier in
-            # the UI to have it here
-            move_data["shared"] = shared_fields
-        else:
-            move_data.update(shared_fields)
 
     if for_edit:
-        fen = move.fen
-        san = move.san
-        color = move.variation.chapter.color
+        assert (
+            shared_candidates is not None and matching_move_count is not None
+        ), "for_edit needs batched shared_candidates and matching_move_count"
 
-        move_data["shared_candidates"] = get_shared_candidates(fen, san, color)
+        move_data["shared_candidates"] = shared_candidates
         move_data["shared_dropdown"] = get_shared_dropdown(
-            fen, san, color, shared_move=shared
+            shared_candidates, shared_move=shared
         )
-        move_data["matching_move_count"] = get_matching_moves(fen, san, color).count()
+        move_data["matching_move_count"] = matching_move_count
 
     return move_data
 
 
-def get_shared_dropdown(fen, san, color, shared_move=None) -> list[dict]:
-    candidates = get_shared_candidates(fen, san, color)
+def get_shared_dropdown(candidates, shared_move=None) -> list[dict]:
     dropdown = []
 
     if not candidates:
@@ -200,7 +230,8 @@ def serialize_shared_move(
         "total_matching_moves": len(matching_moves),
     }
 
-    temp_annotations = ANNOTATIONS.copy()
+    # copy on write, as in serialize_variation
+    temp_annotations = ANNOTATIONS
 
     # Editable SharedMove blocks
     for shared_move in shared_moves:
@@ -217,6 +248,8 @@ def serialize_shared_move(
         )
         # Similar to variation serialization, preserve unknowns
         if shared_move.annotation and shared_move.annotation not in temp_annotations:
+            if temp_annotations is ANNOTATIONS:
+                temp_annotations = dict(ANNOTATIONS)
             temp_annotations[shared_move.annotation] = (
                 f"unknown: {shared_move.annotation}"
             )
@@ -230,10 +263,14 @@ def serialize_shared_move(
             normalize_alts(move.alt),
             normalize_alts(move.alt_fail),
             normalize_shapes(move.shapes),
-            str(move.shared_move.id) if move.shared_move else "",
+            str(move.shared_move_id) if move.shared_move_id else "",
         )
         grouped[key].append(move)
 
+    # matching moves normally all share one position, so the dropdown
+    # candidates are looked up once rather than once per group
+    candidates_by_position = {}
+
     for (
         text,
         annotation,
@@ -242,6 +279,13 @@ def serialize_shared_move(
         shapes,
         shared_move_id,
     ), group in grouped.items():
+        example = group[0]
+        variation = example.variation
+        chapter = variation.chapter
+
+        position = (example.fen, example.san, chapter.color)
+        if position not in candidates_by_position:
+            candidates_by_position[position] = get_shared_candidates(*position)
 
         move_data["move_groups"].append(
             {
@@ -251,25 +295,24 @@ def serialize_shared_move(
                 "alt": alt,
                 "alt_fail": alt_fail,
                 "shapes": shapes,
-                "move_sequence": group[0].sequence,
+                "move_sequence": example.sequence,
                 "example_variation": {
-                    "id": group[0].variation.id,
-                    "title": group[0].variation.title,
-                    "chapter": group[0].variation.chapter.title,
+                    "id": variation.id,
+                    "title": variation.title,
+                    "chapter": chapter.title,
                 },
                 "shared_move_id": shared_move_id,
                 "shared_dropdown": get_shared_dropdown(
-                    group[0].fen,
-                    group[0].san,
-                    group[0].variation.chapter.color,
-                    shared_move=shared_move_id,
+                    candidates_by_position[position], shared_move=shared_move_id
                 ),
-                "in_sync": move_is_in_sync_with_shared(group[0]),  # all same in group
+                "in_sync": move_is_in_sync_with_shared(example),  # all same in group
                 "move_ids": [move.id for move in group],
-                "variation_ids": [move.variation.id for move in group],
+                "variation_ids": [move.variation_id for move in group],
             }
         )
         if annotation and annotation not in temp_annotations:
+            if temp_annotations is ANNOTATIONS:
+                temp_annotations = dict(ANNOTATIONS)
             temp_annotations[annotation] = f"unknown: {annotation}"
 
     move_data["move_groups"].sort(key=lambda g: g["count"], reverse=True)
@@ -291,14 +334,16 @@ def move_is_in_sync_with_shared(move):
     )
 
 
+# the grouping normalizers below are pure, and the moves being grouped mostly
+# repeat the same few strings, so we cache them
+@lru_cache(maxsize=1024)
 def normalize_alts(alt_str):
     if not alt_str:
         return ""
-    return ", ".join(
-        sorted(part.strip() for part in alt_str.split(",") if part.strip())
-    )
+    return ", ".join(sorted(filter(None, map(str.strip, alt_str.split(",")))))
 
 
+@lru_cache(maxsize=1024)
 def normalize_shapes(shapes_str):
     """normalize shapes JSON so we can compare them for grouping"""
     if not shapes_str:
@@ -317,6 +362,7 @@ def normalize_shapes(shapes_str):
 
 
 def serialize_variation_to_import_format(variation):
+    last_review = variation.get_latest_quiz_result_datetime()
     return {
         "variation_id": variation.id,
         "source": variation.source,
@@ -326,34 +372,39 @@ def serialize_variation_to_import_format(variation):
         "is_intro": variation.is_intro,
         "archived": variation.archived,
         "level": variation.level,
-        "created_at": variation.created_at.replace(microsecond=0).isoformat(),
-        "next_review": variation.next_review.replace(microsecond=0).isoformat(),
+        "created_at": variation.created_at.isoformat(timespec="seconds"),
+        "next_review": variation.next_review.isoformat(timespec="seconds"),
         "last_review": (
-            variation.get_latest_quiz_result_datetime()
-            .replace(microsecond=0)
-            .isoformat()
-            if variation.quiz_results.exists()
+            last_review.isoformat(timespec="seconds")
+            if last_review
             else util.END_OF_TIME_STR
         ),
         "start_move": variation.start_move,
         "moves": [
-            {
-                "move_num": m.move_num,
-                # "fen": m.fen  # probably don't need this
-                "san": m.san,
-                "annotation": m.get_resolved_field("annotation"),
-                # Normalize textarea CRLF line endings
-                "text": m.get_resolved_field("text").replace("\r\n", "\n"),
-                "alt": m.get_resolved_field("alt"),
-                "alt_fail": m.get_resolved_field("alt_fail"),
-                "shapes": json.loads(m.get_resolved_field("shapes")),
-            }
-            for m in variation.moves.all().order_by("sequence")
+            serialize_move_to_import_format(m)
+            for m in variation.moves.all()  # ordered by sequence (Move.Meta)
         ],
         "mainline": variation.mainline_moves_str,
     }
 
 
+def serialize_move_to_import_format(move):
+    resolved = move.get_resolved_fields()
+    shapes = resolved["shapes"]
+    return {
+        "move_num": move.move_num,
+        # "fen": move.fen  # probably don't need this
+        "san": move.san,
+        "annotation": resolved["annotation"],
+        # Normalize textarea CRLF line endings
+        "text": resolved["text"].replace("\r\n", "\n"),
+        "alt": resolved["alt"],
+        "alt_fail": resolved["alt_fail"],
+        # most moves have no shapes; skip decoding the empty list
+        "shapes": json.loads(shapes) if shapes != "[]" else [],
+    }
+
+
 def bulk_export_json_chunks(qs, indent=2, chunk_size=2000):
     """
     Yield JSON string chunks for a streaming bulk export of variations.
@@ -381,7 +432,9 @@ def get_history(variation):
     """
     history = []
     now = timezone.now()
-    for quiz_result in variation.quiz_results.all().order_by("-datetime"):
+    # newest first: from the for_serialization() prefetch, or QuizResult.Meta
+    # ordering without one (order_by() here would throw a prefetch away)
+    for quiz_result in variation.quiz_results.all():
         history.append(
             {
                 "datetime": util.get_time_ago(now, quiz_result.datetime),
@@ -392,9 +445,16 @@ def get_history(variation):
     return history
 
 
+SAN_SEPARATOR_RE = re.compile(r"[\s,]+")
+
+
 def parse_san_moves(alt_moves):
     """handles various lists: 1, 2, 3 or 1,2,3 or 1 2 3"""
-    return [move.strip() for move in re.split(r"[\s,]+", alt_moves) if move]
+    if not alt_moves:  # most moves have no alts
+        return []
+    if "," not in alt_moves:
+        return alt_moves.split()
+    return [move.strip() for move in SAN_SEPARATOR_RE.split(alt_moves) if move]
 
 
 def add_alt_shapes_to_moves(moves_list):
@@ -433,8 +493,8 @@ def add_alt_shapes_to_moves(moves_list):
 
 
 def add_alt_shape(shapes, move, color):
-    from_square = chess.square_name(move.from_square)
-    to_square = chess.square_name(move.to_square)
+    from_square = chess.SQUARE_NAMES[move.from_square]
+    to_square = chess.SQUARE_NAMES[move.to_square]
     shapes.append({"orig": from_square, "dest": to_square, "brush": color})
 
 
@@ -560,82 +620,111 @@ def get_source_html(source):
     return "".join(parts)
 
 
-def generate_variation_html(variation):
-    html = ""
-    white_to_move = True
+def generate_variation_html(variation, moves=None):
+    """
+    The rendered HTML only changes when a move's resolved annotation or text
+    does, so we cache it keyed on those inputs. Keying on content rather than
+    on the variation row means edits to a shared move are picked up, too.
+    """
+    if moves is None:
+        moves = list(variation.moves.all())
+    cache_key = get_variation_html_cache_key(variation.id, moves)
+    return cache.get_or_set(
+        cache_key,
+        lambda: render_variation_html(moves),
+        VARIATION_HTML_CACHE_TIMEOUT,
+    )
+
+
+def get_variation_html_cache_key(variation_id, moves) -> str:
+    digest = hashlib.sha1()
+    for move in moves:
+        for value in (
+            move.sequence,
+            move.move_num,
+            move.san,
+            move.get_resolved_field("annotation"),
+            move.get_resolved_field("text"),
+        ):
+            digest.update(f"{value}\x00".encode())
+    version = VARIATION_HTML_CACHE_VERSION
+    return f"variation_html:v{version}:{variation_id}:{digest.hexdigest()}"
+
+
+def render_variation_html(moves) -> str:
+    html_parts = []
     beginning_of_move_group = True
-    pgn_moves = ""
     board = chess.Board()
-    for move in variation.moves.iterator():
+    for move in moves:
         resolved_annotation = move.get_resolved_field("annotation")
         resolved_move_text = move.get_resolved_field("text")
 
-        if white_to_move:
+        if move.white_to_move:
             move_str = f"{move.move_num}."  # White always has dot and number
-            pgn_moves += f"{move.move_num}.{move.san} "  # For PGN parsing
         else:
             move_str = f"{move.move_num}..." if beginning_of_move_group else ""
-            pgn_moves += f" {move.san} "  # For PGN parsing
-
-        white_to_move = not white_to_move
 
         if beginning_of_move_group:
-            html += "<h3 class='variation-mainline'>"
+            html_parts.append("<h3 class='variation-mainline'>")
             beginning_of_move_group = False
 
         move_str += f"{move.san}{resolved_annotation}"
 
-        html += format_html(
-            '<span class="move mainline-move" data-index="{}">{}</span>',
-            move.sequence,
-            move_str,
+        html_parts.append(
+            format_html(
+                '<span class="move mainline-move" data-index="{}">{}</span>',
+                move.sequence,
+                move_str,
+            )
         )
 
         board.push_san(move.san)  # Mainline moves better be valid
 
         if resolved_move_text:
             beginning_of_move_group = True
-            parsed_blocks = get_parsed_blocks(move, board.copy())
+            parsed_blocks = get_parsed_blocks(move, board)
             subvar_html = generate_subvariations_html(move.sequence, parsed_blocks)
 
-            html += f"</h3>{subvar_html}"
+            html_parts.append(f"</h3>{subvar_html}")
 
     if not beginning_of_move_group:
-        html += "</h3>"
+        html_parts.append("</h3>")
 
-    return html
+    return "".join(html_parts)
 
 
 def get_final_move_simple_subvariations_html(variation):
-    html = ""
+    html_parts = []
     previous_type = ""
-    move = None
+
+    # the review view has these prefetched already; otherwise it's one query
+    moves = list(variation.moves.all())
+    if not moves:
+        return ""
+    move = moves[-1]
 
     # advance board to the final move
     board = chess.Board()
-    for move in variation.moves.iterator():
+    for mainline_move in moves:
         # Mainline moves better be valid
         # (but maybe should still fall back...)
-        board.push_san(move.san)
+        board.push_san(mainline_move.san)
 
-    if not move:
-        return html
-
-    parsed_blocks = get_parsed_blocks(move, board.copy())
+    parsed_blocks = get_parsed_blocks(move, board)
 
     for block in parsed_blocks:
         if block.type_ == "comment":
             comment = block.display_text
-            html += f" {util.clean_html(comment)} "
+            html_parts.append(f" {util.clean_html(comment)} ")
         elif block.type_ == "move":
             move_text = block.move_verbose if previous_type != "move" else block.raw
-            html += f" {strip_tags(move_text)} "
+            html_parts.append(f" {strip_tags(move_text)} ")
         previous_type = block.type_
 
-    if html:
-        html = f"<h3>{move.move_verbose}</h3>\n{html}"
+    if not html_parts:
+        return ""
 
-    return html
+    return f"<h3>{move.move_verbose}</h3>\n" + "".join(html_parts)
 
 
 @dataclass
@@ -774,13 +863,6 @@ def print_block_type_info(block: ParsedBlock):
     print(f"block type: {block.type_} {text}")
 
 
-def get_next_type(blocks: list[ParsedBlock], i: int) -> str:
-    try:
-        return blocks[i + 1].type_
-    except IndexError:
-        return ""
-
-
 BLOCK_RENDERERS = {
     "comment": render_comment_block,
     "start": render_start_block,
@@ -788,6 +870,9 @@ BLOCK_RENDERERS = {
     "move": render_move_block,
 }
 
+PAREN_SPACE_SPAN_RE = re.compile(r"\( +<span")
+SPAN_SPACE_PUNCTUATION_RE = re.compile(r"<\/span> +([),.!?])")
+
 
 def generate_subvariations_html(
     mainline_move_sequence: int,
@@ -799,19 +884,22 @@ def generate_subvariations_html(
     cargo of pgn slurry, which we'll finally pour into HTML.
     """
     state = RenderState(debug=debug)
-    html = ""
+    html_parts = []
+    last_index = len(parsed_blocks) - 1
     for i, block in enumerate(parsed_blocks):
         if debug:
             print_block_type_info(block)
 
-        state.next_type = get_next_type(parsed_blocks, i)
+        state.next_type = parsed_blocks[i + 1].type_ if i < last_index else ""
         renderizer = BLOCK_RENDERERS.get(block.type_)
         assert renderizer, f"Unknown block type: {block.type_}"
-        html += renderizer(block, state)
+        html_parts.append(renderizer(block, state))
         state.previous_type = block.type_
 
     if state.in_paragraph:
-        html += "</p>"  # and no need to unset state here at the end 🪦
+        html_parts.append("</p>")  # and no need to unset state here at the end 🪦
+
+    html = "".join(html_parts)
 
     # This might be the place to do various cleanup? e.g. <p></p>,
     # although that one we might want to handle/prevent earlier.
@@ -822,8 +910,8 @@ def generate_subvariations_html(
 
     # hr is already a break, and the extra br can cause too much space
     html = html.replace("<hr><br/>", "<hr>")
-    html = re.sub(r"\( +<span", r"(<span", html)
-    html = re.sub(r"<\/span> +([),.!?])", r"</span>\1", html)
+    html = PAREN_SPACE_SPAN_RE.sub(r"(<span", html)
+    html = SPAN_SPACE_PUNCTUATION_RE.sub(r"</span>\1", html)
 
     return (
         '<div class="subvariations" data-mainline-index="'
@@ -831,8 +919,11 @@ def generate_subvariations_html(
     )
 
 
+TAG_NAME_RE = re.compile(r"<(/)?(\w+)")
+
+
 def is_block_element(chunk: str) -> bool:
-    tag_match = re.match(r"<(/)?(\w+)", chunk.strip())
+    tag_match = TAG_NAME_RE.match(chunk.strip())
     if not tag_match:
         return False
     tag = tag_match.group(2).lower()
@@ -844,16 +935,18 @@ def render_chunks_with_br(chunks: list[str], state: RenderState) -> str:
     I think we should expect alternating block and non-block chunks?
     """
     output = []
+    # each chunk is checked as both "this" and "next", so classify once
+    block_flags = [is_block_element(chunk) for chunk in chunks]
 
     for i, chunk in enumerate(chunks):
         if i + 1 == len(chunks):
             is_last_chunk = True
             next_is_block = False
         else:
-            next_is_block = is_block_element(chunks[i + 1])
+            next_is_block = block_flags[i + 1]
             is_last_chunk = False
 
-        if is_block_element(chunk):
+        if block_flags[i]:
             if state.in_paragraph:
                 output.append("</p>")
                 state.in_paragraph = False
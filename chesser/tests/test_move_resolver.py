@@ -1196,3 +1196,32 @@ def test_get_parsed_blocks_from_string_preserves_literal_braces_in_comments():
     # We should see the literal braces, not sentinels
     output = [b.raw for b in blocks]
     assert " ".join(output) == "{(Guide: use {{ and }} to show literal braces)}"
+
+
+def test_get_board_from_fen_returns_independent_copies():
+    fen = "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"
+    board = move_resolver.get_board_from_fen(fen)
+    board.push_san("Bb5")
+
+    assert move_resolver.get_board_from_fen(fen).fen() == fen
+
+    with pytest.raises(ValueError):
+        move_resolver.get_board_from_fen("not a fen")
+
+
+@pytest.mark.parametrize(
+    "token, expected",
+    [
+        ("1.", True),
+        ("12...", True),
+        ("1. ", True),
+        ("3", True),
+        ("1. e4", False),
+        ("1...Nf3", False),
+        ("e4", False),
+        ("...", False),
+        ("", False),
+    ],
+)
+def test_is_move_number_token(token, expected):
+    assert move_resolver.is_move_number_token(token) is expected
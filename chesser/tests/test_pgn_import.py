@@ -4,7 +4,11 @@ import chess
 import chess.pgn
 import pytest
 
-from chesser.pgn_import import extract_move_text, extract_pgn_directives
+from chesser.pgn_import import (
+    convert_pgn_to_json,
+    extract_move_text,
+    extract_pgn_directives,
+)
 
 PGN_QGD = """\
 [Event "?"]
@@ -127,6 +131,31 @@ def test_variation_order_main_then_siblings_not_garbled() -> None:
     assert idx_e3 < idx_alt, f"Expected 6.e3 to appear before 6.Nxd5??:\n{text}"
 
 
+PGN_NESTED = """\
+[Event "?"]
+[Result "*"]
+
+1.e4 e5 2.Nf3 {Developing.} (2.f4 {The gambit.} 2...exf4 (2...d5 {Countering.} 3.exd5 e4) 3.Nf3 {Stopping Qh4+.} 3...g5) 2...Nc6 (2...d6 3.d4 {Central.} 3...exd4 4.Nxd4) 3.Bb5 *
+"""  # noqa: E501
+
+
+def test_convert_pgn_to_json_renders_nested_variations_and_comment_breaks() -> None:
+    moves = convert_pgn_to_json(PGN_NESTED)["moves"]
+
+    assert [(m["san"], m["text"]) for m in moves] == [
+        ("e4", ""),
+        ("e5", ""),
+        (
+            "Nf3",
+            "{Developing.}\n\n"
+            "(2.f4 {The gambit.} 2...exf4 (2...d5 {Countering.} 3.exd5 e4) "
+            "3.Nf3 {Stopping Qh4+.} 3...g5)",
+        ),
+        ("Nc6", "(2...d6 3.d4 {Central.} 3...exd4 4.Nxd4)"),
+        ("Bb5", ""),
+    ]
+
+
 def test_extract_pgn_directives_empty_text():
     cleaned, shapes = extract_pgn_directives("")
     assert cleaned == ""
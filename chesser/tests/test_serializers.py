@@ -1,11 +1,40 @@
+from unittest import mock
+
 import pytest
+from django.core.cache import cache
+from django.utils import timezone
 
 from chesser import serializers, util
-from chesser.models import Chapter, Move, Variation
+from chesser.models import Chapter, Move, QuizResult, SharedMove, Variation
 from chesser.move_resolver import ParsedBlock
 from chesser.tests import assert_equal
 
 
+@pytest.fixture()
+def variation_with_moves(db):
+    chapter = Chapter.objects.create(title="Test Chapter", color="white")
+    variation = Variation.objects.create(
+        title="Test Variation",
+        chapter=chapter,
+        mainline_moves_str="1.e4 e5",
+    )
+    Move.objects.create(
+        variation=variation,
+        move_num=1,
+        sequence=0,
+        san="e4",
+        fen="rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1",
+    )
+    Move.objects.create(
+        variation=variation,
+        move_num=1,
+        sequence=1,
+        san="e5",
+        fen="rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+    )
+    return variation
+
+
 # @pytest.mark.skip(reason="disabled while working on real tests")
 @pytest.mark.django_db
 def test_exercise_serializers():
@@ -348,3 +377,192 @@ def test_render_end_block(block_data, initial_state, expected_html, expected_sta
     html = serializers.render_end_block(block, state)
     assert_equal(expected_html, html)
     assert state.in_paragraph == expected_state["in_paragraph"]
+
+
+def test_serialize_variation_unknown_annotations(variation_with_moves):
+    variation = variation_with_moves
+    variation.moves.filter(san="e4").update(annotation="!")
+    move = variation.moves.get(san="e5")
+
+    data = serializers.serialize_variation(variation)
+    assert data["annotations"] == serializers.ANNOTATIONS
+
+    move.annotation = "?!?"
+    move.save()
+
+    data = serializers.serialize_variation(variation)
+    assert data["annotations"]["?!?"] == "unknown: ?!?"
+    assert "?!?" not in serializers.ANNOTATIONS
+
+
+def test_serialize_variation_for_serialization_queryset(
+    variation_with_moves, django_assert_num_queries
+):
+    variation = variation_with_moves
+    now = timezone.now()
+    for days_ago, passed in ((3, False), (1, True), (2, False)):
+        QuizResult.objects.create(
+            variation=variation,
+            passed=passed,
+            level=1,
+            datetime=now - timezone.timedelta(days=days_ago),
+        )
+
+    # variation, moves (with shared moves), quiz results
+    with django_assert_num_queries(3):
+        variation = Variation.objects.for_serialization().get(pk=variation.id)
+        data = serializers.serialize_variation(variation)
+
+    assert [m["san"] for m in data["moves"]] == ["e4", "e5"]
+    assert [h["passed"] for h in data["history"]] == ["✅", "❌", "❌"]
+    assert data["time_since_last_review"] == "1 day ago"
+
+
+def test_get_history_is_newest_first_without_prefetch(variation_with_moves):
+    variation = variation_with_moves
+    now = timezone.now()
+    for days_ago, passed in ((3, False), (1, True), (2, False)):
+        QuizResult.objects.create(
+            variation=variation,
+            passed=passed,
+            level=1,
+            datetime=now - timezone.timedelta(days=days_ago),
+        )
+
+    history = serializers.get_history(Variation.objects.get(pk=variation.id))
+
+    assert [h["passed"] for h in history] == ["✅", "❌", "❌"]
+
+
+def test_serialize_variation_reads_moves_once(
+    variation_with_moves, django_assert_num_queries
+):
+    variation = Variation.objects.select_related("chapter").get(
+        pk=variation_with_moves.id
+    )
+    # moves, latest quiz result, quiz history
+    with django_assert_num_queries(3):
+        data = serializers.serialize_variation(variation, mode="variation")
+
+    assert [m["san"] for m in data["moves"]] == ["e4", "e5"]
+    assert data["analysis_url"].startswith("https://lichess.org/analysis/pgn//e4_e5")
+
+
+@pytest.mark.django_db
+def test_serialize_shared_move_unknown_annotations():
+    shared_move = SharedMove.objects.create(
+        fen=util.START_FEN, san="e4", opening_color="white", annotation="!"
+    )
+
+    data = serializers.serialize_shared_move([shared_move], [])
+    assert data["annotations"] == serializers.ANNOTATIONS
+
+    shared_move.annotation = "?!?"
+    data = serializers.serialize_shared_move([shared_move], [])
+    assert data["annotations"]["?!?"] == "unknown: ?!?"
+    assert "?!?" not in serializers.ANNOTATIONS
+
+
+@pytest.mark.parametrize(
+    "alt_moves, expected",
+    [
+        ("", []),
+        ("d4", ["d4"]),
+        ("d4 Nf3  c4", ["d4", "Nf3", "c4"]),
+        ("d4,Nf3, c4", ["d4", "Nf3", "c4"]),
+        (" d4 , Nf3 ,", ["d4", "Nf3"]),
+    ],
+)
+def test_parse_san_moves(alt_moves, expected):
+    assert serializers.parse_san_moves(alt_moves) == expected
+
+
+def test_serialize_variation_to_import_format_for_export(
+    variation_with_moves, django_assert_num_queries
+):
+    variation = variation_with_moves
+
+    # variation (with chapter and latest review), moves (with shared moves)
+    with django_assert_num_queries(2):
+        variation = Variation.objects.for_export().get(pk=variation.id)
+        data = serializers.serialize_variation_to_import_format(variation)
+    assert data["last_review"] == util.END_OF_TIME_STR
+    assert [m["san"] for m in data["moves"]] == ["e4", "e5"]
+
+    last_review = timezone.now().replace(microsecond=0)
+    QuizResult.objects.create(
+        variation=variation, passed=True, level=1, datetime=last_review
+    )
+    variation = Variation.objects.for_export().get(pk=variation.id)
+    data = serializers.serialize_variation_to_import_format(variation)
+    assert data["last_review"] == last_review.isoformat()
+
+
+def test_serialize_variation_edit_batches_move_lookups(
+    variation_with_moves, django_assert_num_queries
+):
+    variation = variation_with_moves
+    e5 = variation.moves.get(san="e5")
+    Move.objects.create(
+        variation=variation,
+        move_num=2,
+        sequence=2,
+        san="Nf3",
+        fen="rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2",
+    )
+    shared_move = SharedMove.objects.create(
+        fen=e5.fen, san="e5", opening_color="white", annotation="!"
+    )
+
+    # variation, moves, quiz results, chapters, shared candidates, matching counts
+    with django_assert_num_queries(6):
+        variation = Variation.objects.for_serialization().get(pk=variation.id)
+        data = serializers.serialize_variation(variation, mode="edit")
+
+    moves = data["moves"]
+    assert [m["matching_move_count"] for m in moves] == [1, 1, 1]
+    assert moves[0]["shared_candidates"] == {}
+    assert list(moves[1]["shared_candidates"]) == [str(shared_move.id)]
+    assert moves[1]["shared_dropdown"][1]["value"] == str(shared_move.id)
+
+
+def test_generate_variation_html_is_cached(variation_with_moves):
+    variation = variation_with_moves
+    e4 = variation.moves.get(san="e4")
+    e4.text = "(1.d4 d5)"
+    e4.save()
+    cache.clear()
+
+    with mock.patch.object(
+        serializers, "render_variation_html", wraps=serializers.render_variation_html
+    ) as render:
+        html = serializers.generate_variation_html(variation)
+        assert serializers.generate_variation_html(variation) == html
+    render.assert_called_once()
+
+    def get_key():
+        return serializers.get_variation_html_cache_key(
+            variation.id, list(variation.moves.select_related("shared_move"))
+        )
+
+    key = get_key()
+    assert key.startswith(
+        f"variation_html:v{serializers.VARIATION_HTML_CACHE_VERSION}:{variation.id}:"
+    )
+
+    e4.text = "(1.c4 e5)"
+    e4.save()
+    assert get_key() != key
+    key = get_key()
+
+    shared_move = SharedMove.objects.create(
+        fen=e4.fen, san="e4", opening_color="white", text="(1.d4 d5)"
+    )
+    e4.shared_move = shared_move
+    e4.save()
+    assert get_key() != key
+    key = get_key()
+
+    shared_move.text = "(1.Nf3 d5)"
+    shared_move.save()
+    assert get_key() != key
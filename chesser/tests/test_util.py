@@ -1,6 +1,7 @@
 import pytest
 
 from chesser import util
+from chesser.models import Chapter, Variation
 
 
 def test_end_of_time_constants():
@@ -123,3 +124,15 @@ def test_normalize_notation(test_input, expected):
 )
 def test_normalize_alt_moves(raw, expected):
     assert util.normalize_alt_moves(raw) == expected
+
+
+def test_get_analysis_url_from_mainline():
+    chapter = Chapter(title="Test Chapter", color="black")
+    variation = Variation(chapter=chapter, mainline_moves_str="1.d4 Nf6 2.c4 e6")
+
+    assert util.get_analysis_url(variation) == (
+        "https://lichess.org/analysis/pgn//d4_Nf6_c4_e6?color=black&#"
+    )
+    assert util.get_analysis_url(variation, index=3, sans=["d4", "d5"]) == (
+        "https://lichess.org/analysis/pgn//d4_d5?color=black&#3"
+    )
@@ -83,8 +83,11 @@ def safe_href(url: str) -> str:
     return ""
 
 
+_STRIP_MOVE_NUMBERS_RE = re.compile(r"\d+\.(\.\.)?")
+
+
 def strip_move_numbers(move_str):
-    return re.sub(r"\d+\.(\.\.)?", "", move_str).strip()
+    return _STRIP_MOVE_NUMBERS_RE.sub("", move_str).strip()
 
 
 def plural(unit: str, count: int) -> str:
@@ -190,6 +193,24 @@ def get_common_move_prefix_html(mainline_moves_str, previous_moves, use_class=Tr
     return f"{common_span} {rest_of_moves}".strip(), current_moves
 
 
+_NOTATION_TOKEN_RE = re.compile(
+    r"""(?x)
+    ^(                                          # one big capture
+        (?:
+            \d+\.+                              # move number + dots
+            |
+            [a-h](?:x[a-h])?[1-8](?:=[QRNB])?   # pawn
+            |
+            [RNQBK][a-h1-8]?x?[a-h][1-8]        # pieces
+            |
+            O-O(?:-O)?                          # castles
+        )
+        (?:[!?]*[+#]?[!?]*)?                    # annotations/check in any order
+    )"""
+)
+_ANNOTATION_GLYPHS_RE = re.compile(r"[!?]+")
+
+
 def normalize_notation(moves):
     """
     normalize move strings, e.g. 1. e4 e5 2. Nf3 ➤ 1.e4 e5 2.Nf3
@@ -203,31 +224,17 @@ def normalize_notation(moves):
     this was brought in from another project and the unmangling part is nice,
     but maybe should be looking at a proper parser
     """
-    regex = r"""(?x)
-        ^(                                          # one big capture
-            (?:
-                \d+\.+                              # move number + dots
-                |
-                [a-h](?:x[a-h])?[1-8](?:=[QRNB])?   # pawn
-                |
-                [RNQBK][a-h1-8]?x?[a-h][1-8]        # pieces
-                |
-                O-O(?:-O)?                          # castles
-            )
-            (?:[!?]*[+#]?[!?]*)?                    # annotations/check in any order
-        )"""
-
     old_string = moves.strip()
     new_string = ""
 
     while True:
-        m = re.match(regex, old_string)
+        m = _NOTATION_TOKEN_RE.match(old_string)
         if not m:
             break
 
         token = m.group(1)
         # Drop annotation glyphs; GUI is the only place for annotation, currently
-        token = re.sub(r"[!?]+", "", token)
+        token = _ANNOTATION_GLYPHS_RE.sub("", token)
         space = "" if token.endswith(".") else " "
         new_string += f"{token}{space}"
         old_string = old_string[m.end() :].strip()  # noqa: E203
@@ -236,6 +243,8 @@ def normalize_notation(moves):
 
 
 _MOVE_NUM_RE = re.compile(r"\b\d+\.(?:\.\.)?\s*")  # 1. or 1...
+_STANDALONE_NUMBER_RE = re.compile(r"\b\d+\b")
+_ALT_SEPARATOR_RE = re.compile(r"[,\s]+")
 
 
 def normalize_alt_moves(value: str) -> str:
@@ -260,9 +269,9 @@ def normalize_alt_moves(value: str) -> str:
         return ""
 
     s = _MOVE_NUM_RE.sub(" ", s)
-    s = re.sub(r"\b\d+\b", " ", s)
+    s = _STANDALONE_NUMBER_RE.sub(" ", s)
 
-    parts = re.split(r"[,\s]+", s)
+    parts = _ALT_SEPARATOR_RE.split(s)
 
     seen = set()
     out = []
@@ -278,8 +287,12 @@ def normalize_alt_moves(value: str) -> str:
     return ", ".join(out)
 
 
-def get_analysis_url(variation, index=None):
-    url_moves = "_".join([move.san for move in variation.moves.all()])
+def get_analysis_url(variation, index=None, sans=None):
+    if sans is None:
+        # mainline_moves_str is kept in step with the moves on import, and
+        # reading it saves fetching the moves just for their SANs
+        sans = strip_move_numbers(variation.mainline_moves_str).split()
+    url_moves = "_".join(sans)
     # in review/variation/edit screens, the UI will add the index of selected move
     # in "shared edit" screen we'll specify it here since there's only one move
     index = "" if index is None else index
@@ -120,16 +120,9 @@ def review(request, variation_id=None):
     else:
         # Can review "on demand", but it won't update level/next_review
         extra_study = True
-        # fmt: off
         variation = get_object_or_404(
-            Variation.objects.select_related(
-                "chapter"
-            ).prefetch_related(
-                "moves",
-                "quiz_results",
-            ),
-            pk=variation_id,
-        )  # fmt: on
+            Variation.objects.for_serialization(), pk=variation_id
+        )
 
         # However! We can learn a new variation on demand and make it count
         learn = request.GET.get("learn") == "1"
@@ -446,8 +439,10 @@ def get_sorted_variations(chapter_id=None, include_archived=False):
     )
 
     if chapter_id is not None:
+        # the chapter list shows time since last review for each variation
         return (
             queryset.filter(chapter_id=chapter_id)
+            .with_latest_quiz_datetime()
             .order_by("intro_priority", "sort_key")
             .iterator()
         )
@@ -497,7 +492,9 @@ def clone(request):
     messages.success(request, f"🧬 Title: {variation_title}")
     messages.success(request, f"🧬 Moves{normalized_label}: {new_variation}")
 
-    variation = get_object_or_404(Variation, pk=original_variation_id)
+    variation = get_object_or_404(
+        Variation.objects.for_export(), pk=original_variation_id
+    )
     import_data = serialize_variation_to_import_format(variation)
     import_data["created_at"] = timezone.now().replace(microsecond=0).isoformat()
 
@@ -562,9 +559,7 @@ def clone(request):
 
 
 def export(request, variation_id=None):
-    variation = get_object_or_404(
-        Variation.objects.prefetch_related("moves", "chapter"), pk=variation_id
-    )
+    variation = get_object_or_404(Variation.objects.for_export(), pk=variation_id)
     export_data = serialize_variation_to_import_format(variation)
     return JsonResponse(
         export_data,
@@ -573,11 +568,7 @@ def export(request, variation_id=None):
 
 
 def bulk_export_json(request):
-    qs = (
-        Variation.objects.select_related("chapter")
-        .prefetch_related("moves")
-        .order_by("id")
-    )
+    qs = Variation.objects.for_export().order_by("id")
     return StreamingHttpResponse(
         bulk_export_json_chunks(qs), content_type="application/json; charset=utf-8"
     )
@@ -660,11 +651,10 @@ def variations_table(request):
 @ensure_csrf_cookie
 def edit(request, variation_id=None):
     if variation_id is None:
-        variation = Variation.objects.active().first()
+        variation = Variation.objects.for_serialization().active().first()
     else:
         variation = get_object_or_404(
-            Variation.objects.select_related("chapter").prefetch_related("moves"),
-            pk=variation_id,
+            Variation.objects.for_serialization(), pk=variation_id
         )
 
     variation_data = serialize_variation(variation, mode="edit") if variation else {}
@@ -711,8 +701,7 @@ def edit_shared_move(request):
     move_data["variation_id"] = variation_id
 
     variation = get_object_or_404(
-        Variation.objects.select_related("chapter").prefetch_related("moves"),
-        pk=variation_id,
+        Variation.objects.select_related("chapter"), pk=variation_id
     )
     move_index = util.get_move_index_from_fen(fen)
     move_data["analysis_url"] = util.get_analysis_url(variation, index=move_index)
@@ -876,11 +865,10 @@ def save_shared_move(request):
 
 def variation(request, variation_id=None):
     if variation_id is None:
-        variation = Variation.objects.active().first()
+        variation = Variation.objects.for_serialization().active().first()
     else:
         variation = get_object_or_404(
-            Variation.objects.select_related("chapter").prefetch_related("moves"),
-            pk=variation_id,
+            Variation.objects.for_serialization(), pk=variation_id
         )
 
     variation_data = (